@@ -0,0 +1,153 @@
+from collections import Counter, defaultdict
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Qt, Signal
+from PySide6.QtGui import QImageReader, QPixmap, QTransform
+
+from masks import AlphaMask
+
+DEFAULT_FRAME_DELAY = 100  # ms, for frames that don't specify one
+PREFETCH_DEPTH = 2  # Likely next states to keep decoded
+
+
+def decode(path, scale_factor):
+    # QImage-only work, so it is safe to run on a worker thread
+    delays = []
+    images = {1: [], -1: []}
+    masks = {1: [], -1: []}
+
+    reader = QImageReader(str(path))
+    while True:
+        image = reader.read()
+        if image.isNull():
+            break
+        delay = reader.nextImageDelay()
+        delays.append(delay if delay > 0 else DEFAULT_FRAME_DELAY)
+
+        # Scale once here instead of on every frame change
+        scaled = image.scaled(
+            image.width() * scale_factor,
+            image.height() * scale_factor,
+            Qt.KeepAspectRatio,
+            Qt.SmoothTransformation
+        )
+        flipped = scaled.transformed(QTransform().scale(-1, 1))
+        images[1].append(scaled)
+        images[-1].append(flipped)
+        masks[1].append(AlphaMask(scaled))
+        masks[-1].append(AlphaMask(flipped))
+
+    return delays, images, masks
+
+
+class Animation:
+    def __init__(self, decoded):
+        self.delays, images, self.masks = decoded
+        # Pixmaps have to be made on the GUI thread
+        self.frames = {direction: [QPixmap.fromImage(image) for image in frames]
+                       for direction, frames in images.items()}
+
+    def __len__(self):
+        return len(self.delays)
+
+    def frame(self, index, direction):
+        return self.frames[1 if direction >= 0 else -1][index]
+
+    def mask(self, index, direction):
+        return self.masks[1 if direction >= 0 else -1][index]
+
+
+class DecodeTask(QRunnable):
+    def __init__(self, prefetcher, state, path, scale_factor):
+        super().__init__()
+        self.prefetcher = prefetcher
+        self.state = state
+        self.path = path
+        self.scale_factor = scale_factor
+
+    def run(self):
+        # Delivered to the prefetcher on the GUI thread as a queued signal
+        self.prefetcher.decoded.emit(self.state, decode(self.path, self.scale_factor))
+
+
+class AnimationPrefetcher(QObject):
+    # Keeps only the current animation and the ones predicted to follow it
+    # decoded; everything else is dropped on the next switch
+    decoded = Signal(int, object)
+
+    def __init__(self, animations, scale_factor, priors=None, parent=None):
+        super().__init__(parent)
+        self.animations = animations
+        self.scale_factor = scale_factor
+        self.pool = QThreadPool.globalInstance()
+        self.cache = {}
+        self.wanted = set()
+        self.decoding = set()
+        self.hinted = set()
+        self.prefetched = set()  # Decoded ahead of time and not used yet
+        self.hits = 0  # Switches served by a prefetch
+        self.misses = 0  # Switches that had to decode on the spot
+        self.wasted = 0  # Prefetches dropped before they were used
+
+        # Observed state switches, seeded with the flows we know up front
+        self.transitions = defaultdict(Counter)
+        for state, next_state in priors or []:
+            self.transitions[state][next_state] += 1
+
+        self.decoded.connect(self.on_decoded)
+
+    def get(self, state):
+        if state in self.prefetched:
+            self.prefetched.discard(state)
+            self.hits += 1
+        elif state not in self.cache:
+            self.misses += 1
+            self.cache[state] = Animation(decode(self.animations[state], self.scale_factor))
+        self.hinted.discard(state)
+        return self.cache[state]
+
+    def record(self, state, next_state):
+        self.transitions[state][next_state] += 1
+        predicted = [s for s, _ in self.transitions[next_state].most_common(PREFETCH_DEPTH)]
+
+        # Drop whatever is no longer current, predicted or hinted
+        keep = {next_state} | set(predicted) | self.hinted
+        for cached in list(self.cache):
+            if cached not in keep:
+                del self.cache[cached]
+                if cached in self.prefetched:
+                    self.prefetched.discard(cached)
+                    self.wasted += 1
+
+        self.wanted = set()
+        self.queue(predicted + list(self.hinted))
+
+    def hint(self, state):
+        # Something just made this state likely, e.g. an item was spawned
+        self.hinted.add(state)
+        self.queue([state])
+
+    def queue(self, states):
+        for state in states:
+            if state not in self.animations or not self.animations[state].exists():
+                continue
+            self.wanted.add(state)
+            if state not in self.cache and state not in self.decoding:
+                self.decoding.add(state)
+                self.pool.start(DecodeTask(self, state, self.animations[state], self.scale_factor))
+
+    def on_decoded(self, state, decoded):
+        self.decoding.discard(state)
+        if state in self.cache:
+            return  # A switch got there first and decoded it on the spot
+        if state not in self.wanted:
+            self.wasted += 1  # No longer predicted by the time it was ready
+            return
+        self.cache[state] = Animation(decoded)
+        self.prefetched.add(state)
+
+    def hit_rate(self):
+        # Share of decodes a switch needed that were already done ahead of time
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def unused(self):
+        return self.wasted + len(self.prefetched)
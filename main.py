@@ -1,24 +1,28 @@
 import sys
 import os
+import argparse
 import random
 import json
 from pathlib import Path
 from PySide6.QtWidgets import (QApplication, QMainWindow, QLabel, QWidget, 
                               QVBoxLayout, QProgressBar, QGridLayout)
 from PySide6.QtCore import Qt, QTimer, QRect, QPoint, QPropertyAnimation, QEasingCurve, QSize, Signal, Slot
-from PySide6.QtGui import QMovie, QCursor, QPixmap, QTransform, QFont, QColor
+from PySide6.QtGui import QCursor, QPixmap, QFont, QColor
 
 # Import actual sensor modules
 import temperature
 import carbondioxide
 import door
 
+from scheduler import EventScheduler
+from needs import Needs, clamp
+from animations import AnimationPrefetcher
+from masks import AlphaMask
+from polling import AdaptivePoller
+
 # State file for saving pet stats
 STATE_FILE = 'pet_state.json'
 
-def clamp(value, min_val=0, max_val=100):
-    return max(min_val, min(value, max_val))
-
 class StatWindow(QMainWindow):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -177,11 +181,6 @@ class ItemWindow(QMainWindow):
         # Position randomly on screen
         self.random_position()
         
-        # Set timer for despawning
-        self.despawn_timer = QTimer(self)
-        self.despawn_timer.timeout.connect(self.close)
-        self.despawn_timer.start(30000)  # Despawn after 30 seconds
-        
         self.show()
     
     def load_item(self):
@@ -210,6 +209,10 @@ class ItemWindow(QMainWindow):
         )
         self.item_label.setPixmap(scaled_pixmap)
         self.resize(scaled_pixmap.width(), scaled_pixmap.height())
+        
+        # Opaque pixels only, for overlap tests and click-through
+        self.alpha_mask = AlphaMask(scaled_pixmap.toImage())
+        self.setMask(self.alpha_mask.region)
     
     def random_position(self):
         desktop = QApplication.primaryScreen().availableGeometry()
@@ -228,7 +231,7 @@ class DesktopPet(QMainWindow):
     # Custom signal for state changes
     stat_changed = Signal(int, int, str, int, int, int, str)
     
-    def __init__(self):
+    def __init__(self, webhook=None, sensor_client=None):
         super().__init__()
     
         # Scale factor
@@ -238,7 +241,7 @@ class DesktopPet(QMainWindow):
         self.resize(self.scaled_size)
         
         # Stats
-        self.hunger, self.sleep, self.water = self.load_state()
+        self.needs = self.load_state()
         self.temp = 25  # Default temperature
         self.co2 = 500  # Default CO2
         self.door_state = "Closed"  # Default door state
@@ -288,11 +291,6 @@ class DesktopPet(QMainWindow):
         # Active item window
         self.current_item_window = None
         
-        # Load default animation
-        self.movie = QMovie(str(self.animations[self.IDLE]))
-        self.pet_label.setMovie(self.movie)
-        self.movie.start()
-        
         # Set initial size with scale factor
         base_size = 100
         self.resize(base_size * self.scale_factor, base_size * self.scale_factor)
@@ -312,23 +310,49 @@ class DesktopPet(QMainWindow):
         self.movement_timer.timeout.connect(self.update_position)
         self.movement_timer.start(50)  # Update every 50ms
         
-        self.state_timer = QTimer(self)
-        self.state_timer.timeout.connect(self.change_state)
-        self.state_timer.start(random.randint(5000, 10000))  # Random state changes
-        
-        # Set up item spawn timer
-        self.item_timer = QTimer(self)
-        self.item_timer.timeout.connect(self.spawn_random_item)
-        self.item_timer.start(random.randint(30000, 60000))  # Every 30-60 seconds
+        # Everything slower than movement runs on the shared scheduler
+        self.scheduler = EventScheduler(self)
+        self.scheduler.schedule(random.randint(5000, 10000), self.change_state, name="state")  # Random state changes
+        self.scheduler.schedule(random.randint(30000, 60000), self.spawn_random_item, name="item")  # Every 30-60 seconds
+        self.scheduler.every(5000, self.update_stats, name="stats")  # Update every 5 seconds
+        
+        # Decoded animations, prefetched for the states likely to come next
+        self.prefetcher = AnimationPrefetcher(self.animations, self.scale_factor, parent=self, priors=[
+            (self.JUMPING, self.FALLING),
+            (self.FALLING, self.LANDING),
+            (self.LANDING, self.IDLE),
+        ])
+        self.frame_index = 0
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.timeout.connect(self.next_frame)
         
-        # Set up stats timer
-        self.stats_timer = QTimer(self)
-        self.stats_timer.timeout.connect(self.update_stats)
-        self.stats_timer.start(5000)  # Update every 5 seconds
+        # Load default animation
+        self.set_animation(self.IDLE)
         
         # Connect signals
         self.stat_changed.connect(self.stats_window.update_stats)
         
+        # Readings come from a shared sensor daemon when one is given
+        self.sensor_client = sensor_client
+        
+        # Pushed sensor events replace polling entirely
+        self.webhook = webhook
+        if self.webhook:
+            self.webhook.reading_received.connect(self.on_sensor_event)
+        
+        # Otherwise poll each sensor on its own, as often as it is actually changing
+        self.sensors = {
+            "temperature": temperature.get_temperature,
+            "co2": carbondioxide.get_co2,
+            "door": door.get_door_status,
+        }
+        self.poller = None
+        if not self.webhook and not self.sensor_client:
+            self.poller = AdaptivePoller()
+            for kind in self.sensors:
+                self.schedule_poll(kind, 0)
+        
         # Position on taskbar
         self.move_to_taskbar()
         self.show()
@@ -338,29 +362,55 @@ class DesktopPet(QMainWindow):
 
     def closeEvent(self, event):
         self.save_state()
+        print(f"Animation prefetch hit rate: {self.prefetcher.hit_rate():.0%} "
+              f"({self.prefetcher.hits} of {self.prefetcher.hits + self.prefetcher.misses} decodes done ahead, "
+              f"{self.prefetcher.unused()} prefetched but never used)")
+        if self.poller:
+            print(f"Sensor requests saved against polling every 5 s: {self.poller.requests_saved()}")
         event.accept()  # Allow closing
     
     def load_state(self):
+        # Needs saved while the pet was closed keep decaying until now
         if os.path.exists(STATE_FILE):
             try:
                 with open(STATE_FILE) as f:
-                    data = json.load(f)
-                    return data.get('hunger', 100), data.get('sleep', 100), data.get('water', 100)
+                    return Needs.from_dict(json.load(f))
             except (json.JSONDecodeError, IOError):
-                return 100, 100, 100
-        return 100, 100, 100
+                return Needs()
+        return Needs()
     
     def save_state(self):
         try:
             with open(STATE_FILE, 'w') as f:
-                json.dump({
-                    'hunger': self.hunger, 
-                    'sleep': self.sleep, 
-                    'water': self.water
-                }, f)
+                json.dump(self.needs.to_dict(), f)
         except IOError:
             print("Failed to save pet state")
     
+    # Needs are evaluated from elapsed time whenever they are read
+    @property
+    def hunger(self):
+        return self.needs.value('hunger')
+    
+    @hunger.setter
+    def hunger(self, value):
+        self.needs.set('hunger', value)
+    
+    @property
+    def sleep(self):
+        return self.needs.value('sleep')
+    
+    @sleep.setter
+    def sleep(self, value):
+        self.needs.set('sleep', value)
+    
+    @property
+    def water(self):
+        return self.needs.value('water')
+    
+    @water.setter
+    def water(self, value):
+        self.needs.set('water', value)
+    
     def move_to_taskbar(self):
         desktop = QApplication.primaryScreen().availableGeometry()
         self.move(random.randint(0, desktop.width() - self.width()), 
@@ -368,33 +418,31 @@ class DesktopPet(QMainWindow):
     
     def set_animation(self, state):
         if state in self.animations and os.path.exists(self.animations[state]):
+            animation = self.prefetcher.get(state)
+            if not len(animation):
+                return
+            self.prefetcher.record(self.current_state, state)
             self.current_state = state
-            self.movie.stop()
-            self.movie = QMovie(str(self.animations[state]))
-            
-            # Scale up the movie frames
-            self.movie.setCacheMode(QMovie.CacheAll)
-            self.movie.frameChanged.connect(self.scale_frame)
-            
-            self.pet_label.setMovie(self.movie)
-            self.movie.start()
+            self.animation = animation
+            self.frame_index = 0
+            self.show_frame()
     
-    def scale_frame(self):
-        current_pixmap = self.movie.currentPixmap()
-        
-        if self.direction < 0:
-            # Flip the pixmap horizontally
-            transform = QTransform().scale(-1, 1)
-            current_pixmap = current_pixmap.transformed(transform, Qt.SmoothTransformation)
-        
-        scaled_pixmap = current_pixmap.scaled(
-            current_pixmap.width() * self.scale_factor,
-            current_pixmap.height() * self.scale_factor,
-            Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
-        )
-        self.pet_label.setPixmap(scaled_pixmap)
-        self.resize(scaled_pixmap.width(), scaled_pixmap.height())
+    def show_frame(self):
+        # Frames come pre-scaled and pre-flipped from the prefetcher
+        pixmap = self.animation.frame(self.frame_index, self.direction)
+        self.pet_label.setPixmap(pixmap)
+        self.resize(pixmap.width(), pixmap.height())
+        
+        # Clicks on transparent pixels fall through to whatever is behind
+        self.setMask(self.current_mask().region)
+        self.frame_timer.start(self.animation.delays[self.frame_index])
+    
+    def current_mask(self):
+        return self.animation.mask(self.frame_index, self.direction)
+    
+    def next_frame(self):
+        self.frame_index = (self.frame_index + 1) % len(self.animation)
+        self.show_frame()
     
     def update_position(self):
         if self.is_grabbed:
@@ -427,11 +475,18 @@ class DesktopPet(QMainWindow):
             if new_y >= desktop.height() - self.height():
                 new_y = desktop.height() - self.height()
                 self.set_animation(self.LANDING)
-                QTimer.singleShot(500, lambda: self.set_animation(self.IDLE))
+                self.schedule_pose(500, self.IDLE)
             
             self.move(pos.x(), new_y)
     
+    def schedule_pose(self, delay, state):
+        # Only one pending pose change at a time; a newer one supersedes it
+        self.scheduler.schedule(delay, lambda: self.set_animation(state), name="pose")
+    
     def change_state(self):
+        # Set a new timer interval
+        self.scheduler.schedule(random.randint(3000, 8000), self.change_state, name="state")
+        
         if self.is_grabbed:
             return
             
@@ -464,9 +519,6 @@ class DesktopPet(QMainWindow):
             self.jump()
         else:
             self.set_animation(new_state)
-        
-        # Set a new timer interval
-        self.state_timer.setInterval(random.randint(3000, 8000))
     
     def jump(self):
         self.set_animation(self.JUMPING)
@@ -486,6 +538,9 @@ class DesktopPet(QMainWindow):
         self.jump_animation.start()
     
     def throw(self, direction):
+        # Whatever was queued before the grab no longer applies
+        self.scheduler.cancel("pose")
+        
         pos = self.pos()
         throw_distance = random.randint(100, 300) * self.scale_factor
         throw_height = random.randint(50, 200) * self.scale_factor
@@ -510,9 +565,7 @@ class DesktopPet(QMainWindow):
     
     def spawn_random_item(self):
         # Close existing item window if any
-        if self.current_item_window:
-            self.current_item_window.close()
-            self.current_item_window = None
+        self.despawn_item()
 
         # Choose which type of item to spawn based on needs
         if self.hunger <= min(self.water, self.sleep):
@@ -533,27 +586,41 @@ class DesktopPet(QMainWindow):
                 self.spawn_drink_item()
         
         # Reset timer for next spawn
-        self.item_timer.start(random.randint(30000, 60000))  # 30-60 seconds
+        self.scheduler.schedule(random.randint(30000, 60000), self.spawn_random_item, name="item")  # 30-60 seconds
+    
+    def show_item(self, item_path):
+        self.despawn_item()
+        self.current_item_window = ItemWindow(item_path)
+        self.scheduler.schedule(30000, self.despawn_item, name="despawn")  # Despawn after 30 seconds
+    
+    def despawn_item(self):
+        self.scheduler.cancel("despawn")
+        if self.current_item_window:
+            self.current_item_window.close()
+            self.current_item_window = None
     
     def spawn_bed_item(self):
         # Just use bed.png from props
         item_path = self.props_path / "bed.png"
         if os.path.exists(item_path):
-            self.current_item_window = ItemWindow(item_path)
+            self.prefetcher.hint(self.SLEEPING)
+            self.show_item(item_path)
     
     def spawn_food_item(self):
         # Get random food item
         food_files = list(self.food_path.glob("*.png"))
         if food_files:
             item_path = random.choice(food_files)
-            self.current_item_window = ItemWindow(item_path)
+            self.prefetcher.hint(self.EATING)
+            self.show_item(item_path)
     
     def spawn_drink_item(self):
         # Get random drink item
         drink_files = list(self.drink_path.glob("*.png"))
         if drink_files:
             item_path = random.choice(drink_files)
-            self.current_item_window = ItemWindow(item_path)
+            self.prefetcher.hint(self.DRINKING)
+            self.show_item(item_path)
     
     def check_collision_with_item(self):
         if not self.current_item_window:
@@ -563,8 +630,11 @@ class DesktopPet(QMainWindow):
         pet_rect = self.geometry()
         item_rect = self.current_item_window.geometry()
         
-        # Check for intersection
-        return pet_rect.intersects(item_rect)
+        # Cheap rectangle check first, then compare the visible pixels
+        if not pet_rect.intersects(item_rect):
+            return False
+        offset = item_rect.topLeft() - pet_rect.topLeft()
+        return self.current_mask().overlaps(self.current_item_window.alpha_mask, offset.x(), offset.y())
     
     def interact_with_item(self):
         if not self.current_item_window:
@@ -586,86 +656,110 @@ class DesktopPet(QMainWindow):
             self.set_animation(self.SLEEPING)
             # Increase sleep
             self.sleep = clamp(self.sleep + 30)
-            QTimer.singleShot(3000, lambda: self.set_animation(self.IDLE))
+            self.schedule_pose(3000, self.IDLE)
         elif item_type == "food":
             self.set_animation(self.EATING)
             # Increase hunger
             self.hunger = clamp(self.hunger + 20)
-            QTimer.singleShot(2000, lambda: self.set_animation(self.IDLE))
+            self.schedule_pose(2000, self.IDLE)
         elif item_type == "drink":
             self.set_animation(self.DRINKING)
             # Increase water
             self.water = clamp(self.water + 20)
-            QTimer.singleShot(2000, lambda: self.set_animation(self.IDLE))
+            self.schedule_pose(2000, self.IDLE)
         
         # Update stats display
         self.update_stats()
         self.save_state()
             
         # Close the item window
-        self.current_item_window.close()
-        self.current_item_window = None
+        self.despawn_item()
     
-    def update_stats(self):
-        # Use actual sensor data instead of simulated values
-        try:
-            # Get temperature from sensor
-            temp_data = temperature.get_temperature()
-            if isinstance(temp_data, (int, float)):
-                self.temp = temp_data
+    def apply_reading(self, kind, value):
+        if kind == "temperature":
+            if isinstance(value, (int, float)):
+                self.temp = value
             else:
                 # If there's an error or invalid data, use default
-                print(f"Temperature sensor issue: {temp_data}")
+                print(f"Temperature sensor issue: {value}")
                 self.temp = 25  # Use default value
-                
-            # Get CO2 from sensor
-            co2_data = carbondioxide.get_co2()
-            if isinstance(co2_data, (int, float)):
-                self.co2 = co2_data
+        elif kind == "co2":
+            if isinstance(value, (int, float)):
+                self.co2 = value
             else:
                 # If there's an error or invalid data, use default
-                print(f"CO2 sensor issue: {co2_data}")
+                print(f"CO2 sensor issue: {value}")
                 self.co2 = 500  # Use default value
-                
-            # Get door state from sensor
-            door_data = door.get_door_status()
-            if isinstance(door_data, str):
-                self.door_state = door_data
+        elif kind == "door":
+            if isinstance(value, str):
+                self.door_state = value
             else:
                 # If there's an error or invalid data, use default
-                print(f"Door sensor issue: {door_data}")
+                print(f"Door sensor issue: {value}")
                 self.door_state = "Closed"  # Use default value
-                
+    
+    def schedule_poll(self, kind, delay):
+        self.scheduler.schedule(delay, lambda: self.poll_sensor(kind), name=f"poll:{kind}")
+    
+    def poll_sensor(self, kind):
+        # Use actual sensor data instead of simulated values
+        try:
+            value = self.sensors[kind]()
+        except Exception as e:
+            print(f"Error reading {kind} sensor: {e}")
+            value = None
+        self.apply_reading(kind, value)
+        
+        interval = self.poller.observe(kind, value)
+        self.schedule_poll(kind, int(interval * 1000))
+        self.refresh_stats()
+    
+    def poll_sensors(self):
+        # Read the shared sensor daemon's latest readings
+        try:
+            readings = self.sensor_client.read()
+            for kind in self.sensors:
+                self.apply_reading(kind, readings.get(kind))
         except Exception as e:
             # If any sensor read fails, log error and use default values
             print(f"Error reading sensors: {e}")
             self.temp = 25
             self.co2 = 500
             self.door_state = "Closed"
+    
+    @Slot(str, object)
+    def on_sensor_event(self, kind, value):
+        self.apply_reading(kind, value)
+        self.refresh_stats()
+    
+    def update_stats(self):
+        # Direct sensor polling runs on its own schedule; daemon reads are local
+        if self.sensor_client:
+            self.poll_sensors()
         
-        # Decrease stats based on environment
-        self.hunger -= 0.5
-        self.sleep -= 0.4
-        self.water -= 0.3
-        
-        # Adjust stats based on sensor readings
-        if self.co2 > 1000:
-            self.sleep -= 1  # High CO2 makes pet sleepy faster
-        if self.temp > 28 or self.temp < 18:
-            self.hunger -= 0.5  # Temperature extremes increase hunger
-            self.water -= 0.5  # Temperature extremes increase thirst
-        if self.door_state.lower() == "open":
-            self.hunger -= 1  # Open door increases hunger
-            self.water -= 1  # Open door increases thirst
-        
-        # Clamp values
-        self.hunger = clamp(self.hunger)
-        self.sleep = clamp(self.sleep)
-        self.water = clamp(self.water)
+        self.refresh_stats()
+    
+    def conditions(self):
+        # Sensor conditions that speed up how fast needs decay
+        return {
+            'high_co2': self.co2 > 1000,
+            'temp_extreme': self.temp > 28 or self.temp < 18,
+            'door_open': self.door_state.lower() == "open",
+        }
+    
+    def refresh_stats(self):
+        # Needs only re-anchor when the environment actually changed
+        self.needs.set_conditions(self.conditions())
         
         # Check if pet is dying
         if self.hunger <= 0 or self.sleep <= 0 or self.water <= 0:
             self.set_animation(self.HIT)  # Use hit animation for dying
+        else:
+            # Come back exactly when the first need runs out, not on the next tick
+            delay = int(min(self.needs.time_until(need, 0) for need in ('hunger', 'sleep', 'water')) * 1000)
+            pending = self.scheduler.get("dying")
+            if not pending or abs(pending.remaining() - delay) > 1000:
+                self.scheduler.schedule(delay, self.refresh_stats, name="dying")
             
         # Get mood based on environment
         mood = self.get_mood()
@@ -700,7 +794,16 @@ class DesktopPet(QMainWindow):
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
+            # Only the sprite itself can be grabbed, not the space around it
+            if not self.current_mask().contains(event.pos().x(), event.pos().y()):
+                event.ignore()
+                return
             self.is_grabbed = True
+            self.scheduler.cancel("pose")
+            # Stop a jump or throw in flight so it can't switch to falling mid-grab
+            for animation in (getattr(self, "jump_animation", None), getattr(self, "throw_animation", None)):
+                if animation:
+                    animation.stop()
             self.grab_offset = event.pos()
             # Play hit animation instead of floating
             self.set_animation(self.HIT)
@@ -726,6 +829,24 @@ class DesktopPet(QMainWindow):
 
 # This section is modified to remove the mock modules since we're now using the real ones
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    pet = DesktopPet()
+    parser = argparse.ArgumentParser(description="Desktop pet driven by office sensors")
+    parser.add_argument("--webhook-port", type=int, help="receive pushed sensor events on this port instead of polling")
+    parser.add_argument("--webhook-host", help="address to receive webhooks on (default 127.0.0.1; use 0.0.0.0 when the sensor platform posts here directly)")
+    parser.add_argument("--daemon", nargs="?", const=True, metavar="SOCKET", help="read sensors from a running sensord.py instead of polling")
+    args = parser.parse_args()
+    
+    app = QApplication(sys.argv[:1])
+    
+    receiver = None
+    if args.webhook_port:
+        from webhook import WebhookReceiver, WEBHOOK_HOST
+        receiver = WebhookReceiver(host=args.webhook_host or WEBHOOK_HOST, port=args.webhook_port)
+        receiver.start()
+    
+    client = None
+    if args.daemon:
+        from sensord import SensorClient, SOCKET_PATH
+        client = SensorClient(SOCKET_PATH if args.daemon is True else args.daemon)
+    
+    pet = DesktopPet(webhook=receiver, sensor_client=client)
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,47 @@
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QBitmap, QImage, QRegion
+
+ALPHA_THRESHOLD = 64  # Pixels fainter than this count as transparent
+
+
+class AlphaMask:
+    # One int per row with bit x set where pixel x is opaque, so hit tests are a
+    # bit lookup and overlap tests are a shifted AND per shared row
+    def __init__(self, image, threshold=ALPHA_THRESHOLD):
+        alpha = image.convertToFormat(QImage.Format_Alpha8)
+        self.width = alpha.width()
+        self.height = alpha.height()
+        self.stride = alpha.bytesPerLine()
+        self._region = None
+
+        # Map each alpha byte to '0' or '1' and read the row back as binary
+        table = bytes(48 if a < threshold else 49 for a in range(256))
+        data = bytes(alpha.constBits())
+        self.rows = []
+        for y in range(self.height):
+            row = data[y * self.stride:y * self.stride + self.width].translate(table)
+            self.rows.append(int(row[::-1], 2) if row else 0)
+
+    def contains(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return bool(self.rows[y] >> x & 1)
+        return False
+
+    def overlaps(self, other, dx, dy):
+        # other's top-left sits at (dx, dy) relative to ours
+        for y in range(max(0, dy), min(self.height, dy + other.height)):
+            theirs = other.rows[y - dy]
+            theirs = theirs << dx if dx >= 0 else theirs >> -dx
+            if self.rows[y] & theirs:
+                return True
+        return False
+
+    @property
+    def region(self):
+        # Built on first use; window masks only need it for frames actually shown
+        if self._region is None:
+            row_bytes = (self.width + 7) // 8
+            bits = b''.join(row.to_bytes(row_bytes, 'little') for row in self.rows)
+            bitmap = QBitmap.fromData(QSize(self.width, self.height), bits, QImage.Format_MonoLSB)
+            self._region = QRegion(bitmap)
+        return self._region
@@ -0,0 +1,79 @@
+import time
+
+# Decay per stats tick, as the pet has always lost it
+TICK_SECONDS = 5
+BASE_DECAY = {'hunger': 0.5, 'sleep': 0.4, 'water': 0.3}
+HIGH_CO2_DECAY = {'sleep': 1}  # High CO2 makes pet sleepy faster
+TEMP_EXTREME_DECAY = {'hunger': 0.5, 'water': 0.5}  # Temperature extremes increase hunger and thirst
+DOOR_OPEN_DECAY = {'hunger': 1, 'water': 1}  # Open door increases hunger and thirst
+
+NEEDS = ('hunger', 'sleep', 'water')
+CALM = {'high_co2': False, 'temp_extreme': False, 'door_open': False}
+
+
+def clamp(value, min_val=0, max_val=100):
+    return max(min_val, min(value, max_val))
+
+
+def decay_rates(conditions):
+    # Points lost per second under the given sensor conditions
+    rates = dict(BASE_DECAY)
+    for condition, extra in [('high_co2', HIGH_CO2_DECAY),
+                             ('temp_extreme', TEMP_EXTREME_DECAY),
+                             ('door_open', DOOR_OPEN_DECAY)]:
+        if conditions.get(condition):
+            for need, amount in extra.items():
+                rates[need] += amount
+    return {need: rate / TICK_SECONDS for need, rate in rates.items()}
+
+
+class Needs:
+    # Each need is anchor - rate * elapsed, so nothing has to tick to advance it.
+    # Anchors move only when a value is set or the conditions change.
+    def __init__(self, anchors=None, anchored_at=None, conditions=None):
+        self.anchors = {need: 100 for need in NEEDS}
+        self.anchors.update(anchors or {})
+        self.anchored_at = time.time() if anchored_at is None else anchored_at
+        self.conditions = dict(conditions or CALM)
+        self.rates = decay_rates(self.conditions)
+
+    def value(self, need, now=None):
+        now = time.time() if now is None else now
+        elapsed = max(0, now - self.anchored_at)
+        return clamp(self.anchors[need] - self.rates[need] * elapsed)
+
+    def reanchor(self, now=None):
+        now = time.time() if now is None else now
+        self.anchors = {need: self.value(need, now) for need in NEEDS}
+        self.anchored_at = now
+
+    def set(self, need, value, now=None):
+        self.reanchor(now)
+        self.anchors[need] = clamp(value)
+
+    def set_conditions(self, conditions, now=None):
+        if conditions == self.conditions:
+            return
+        # Close off the old slope before switching to the new one
+        self.reanchor(now)
+        self.conditions = dict(conditions)
+        self.rates = decay_rates(self.conditions)
+
+    def time_until(self, need, level, now=None):
+        # Seconds until the need drops to level under the current conditions
+        current = self.value(need, now)
+        if current <= level:
+            return 0
+        return (current - level) / self.rates[need]
+
+    def to_dict(self):
+        data = dict(self.anchors)
+        data['timestamp'] = self.anchored_at
+        data['conditions'] = self.conditions
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        anchors = {need: data.get(need, 100) for need in NEEDS}
+        # Older state files have no timestamp; start decaying from now
+        return cls(anchors, data.get('timestamp'), data.get('conditions'))
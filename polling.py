@@ -0,0 +1,75 @@
+import time
+
+BASELINE_INTERVAL = 5  # s, the fixed rate every sensor used to be polled at
+BACKOFF = 1.5  # Interval growth per unchanged reading
+
+
+class SensorPolicy:
+    def __init__(self, min_interval, max_interval, tolerance=0, watch=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.tolerance = tolerance  # Smallest change that counts as movement
+        self.watch = watch or []  # (low, high) bands around mood thresholds
+
+    def changed(self, previous, value):
+        if isinstance(value, (int, float)) and isinstance(previous, (int, float)):
+            return abs(value - previous) > self.tolerance
+        return value != previous
+
+    def approaching(self, previous, value):
+        # Drifting inside the band around a threshold, so it may cross soon
+        if not isinstance(value, (int, float)) or not isinstance(previous, (int, float)):
+            return False
+        return value != previous and any(low <= value <= high for low, high in self.watch)
+
+
+POLICIES = {
+    'temperature': SensorPolicy(5, 300, tolerance=0.2, watch=[(17, 19), (27, 29)]),  # Too cold below 18 °C, too hot above 28 °C
+    'co2': SensorPolicy(5, 120, tolerance=25, watch=[(900, 1100)]),  # Dizzy above 1000 ppm
+    'door': SensorPolicy(2, 30),  # Flips in seconds; check again soon after it does
+}
+
+
+class AdaptivePoller:
+    # Per-sensor poll intervals: snap to the minimum when a reading moves and
+    # back off toward the maximum while it stays put
+    def __init__(self, policies=POLICIES, now=None):
+        now = time.time() if now is None else now
+        self.policies = policies
+        self.started = now
+        self.intervals = {kind: BASELINE_INTERVAL for kind in policies}
+        self.due = {kind: now for kind in policies}
+        self.last = {}
+        self.requests = 0
+
+    def observe(self, kind, value, now=None):
+        now = time.time() if now is None else now
+        policy = self.policies[kind]
+        self.requests += 1
+
+        if kind not in self.last or value is None:
+            # Nothing to compare against yet
+            interval = BASELINE_INTERVAL
+        elif policy.changed(self.last[kind], value) or policy.approaching(self.last[kind], value):
+            interval = policy.min_interval
+        else:
+            interval = min(policy.max_interval, self.intervals[kind] * BACKOFF)
+
+        if value is not None:
+            self.last[kind] = value
+        self.intervals[kind] = interval
+        self.due[kind] = now + interval
+        return interval
+
+    def due_now(self, now=None):
+        now = time.time() if now is None else now
+        return [kind for kind, when in self.due.items() if when <= now]
+
+    def next_due(self):
+        return min(self.due.values())
+
+    def requests_saved(self, now=None):
+        # Requests the fixed 5 s schedule would have made, minus the ones we did
+        now = time.time() if now is None else now
+        baseline = len(self.policies) * (int((now - self.started) / BASELINE_INTERVAL) + 1)
+        return baseline - self.requests
@@ -0,0 +1,143 @@
+import heapq
+import itertools
+import time
+from PySide6.QtCore import QObject, QTimer, Qt
+
+# Events due within this window of each other fire on the same wakeup
+COALESCE_MS = 50
+
+
+def now_ms():
+    return time.monotonic() * 1000
+
+
+class EventHandle:
+    def __init__(self, when, seq, callback, name=None, interval=None, scheduler=None):
+        self.scheduler = scheduler
+        self.when = when
+        self.seq = seq
+        self.callback = callback
+        self.name = name
+        self.interval = interval
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.when, self.seq) < (other.when, other.seq)
+
+    @property
+    def active(self):
+        return not self.cancelled
+
+    def remaining(self):
+        return max(0, self.when - now_ms())
+
+    def cancel(self):
+        if self.cancelled:
+            return
+        self.cancelled = True
+        # Let the scheduler drop the event and any wakeup that was only for it
+        if self.scheduler:
+            self.scheduler.discard(self)
+
+
+class EventScheduler(QObject):
+    def __init__(self, parent=None, coalesce_ms=COALESCE_MS):
+        super().__init__(parent)
+        self.coalesce_ms = coalesce_ms
+        self.queue = []
+        self.named = {}  # The one live handle for each event name
+        self.counter = itertools.count()
+        self.wakeups = 0
+
+        # One native timer for every pending event
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.CoarseTimer)
+        self.timer.timeout.connect(self.run_due)
+
+    def schedule(self, delay_ms, callback, name=None, interval=None):
+        # Named events replace any pending event with the same name
+        if name is not None:
+            self.cancel(name)
+        handle = EventHandle(now_ms() + delay_ms, next(self.counter), callback, name, interval, self)
+        heapq.heappush(self.queue, handle)
+        if name is not None:
+            self.named[name] = handle
+        self.rearm()
+        return handle
+
+    def every(self, interval_ms, callback, name=None):
+        return self.schedule(interval_ms, callback, name, interval=interval_ms)
+
+    def cancel(self, name):
+        # Goes through the name table, so it also reaches a handle that was
+        # already popped into the batch run_due is working through
+        handle = self.named.get(name)
+        if handle:
+            handle.cancel()
+
+    def discard(self, handle):
+        handle.cancelled = True
+        if self.named.get(handle.name) is handle:
+            del self.named[handle.name]
+        if handle in self.queue:
+            self.queue.remove(handle)
+            heapq.heapify(self.queue)
+        self.rearm()
+
+    def get(self, name):
+        return self.named.get(name)
+
+    def is_pending(self, name):
+        return name in self.named
+
+    def pending(self):
+        # (name, remaining ms) of every live event, soonest first
+        return [(h.name, int(h.remaining())) for h in sorted(self.queue) if h.active]
+
+    def rearm(self):
+        # Drop cancelled events from the top so they never cause a wakeup
+        while self.queue and self.queue[0].cancelled:
+            heapq.heappop(self.queue)
+
+        if not self.queue:
+            self.timer.stop()
+            return
+
+        # Wake up for the head of the queue, late enough to pick up its neighbours
+        head = self.queue[0].when
+        deadline = head
+        for handle in self.queue:
+            if handle.active and head <= handle.when <= head + self.coalesce_ms:
+                deadline = max(deadline, handle.when)
+        self.timer.start(max(0, int(deadline - now_ms())))
+
+    def run_due(self):
+        self.wakeups += 1
+        cutoff = now_ms() + self.coalesce_ms
+
+        due = []
+        while self.queue and self.queue[0].when <= cutoff:
+            handle = heapq.heappop(self.queue)
+            if handle.active:
+                due.append(handle)
+
+        for handle in due:
+            # A callback earlier in this batch may have cancelled this one
+            if handle.cancelled:
+                continue
+            if handle.interval is not None:
+                # Skip missed repeats instead of bursting after a stall
+                handle.when = max(handle.when + handle.interval, now_ms())
+                handle.seq = next(self.counter)
+                heapq.heappush(self.queue, handle)
+            else:
+                handle.cancelled = True
+                if self.named.get(handle.name) is handle:
+                    del self.named[handle.name]
+            try:
+                handle.callback()
+            except Exception as e:
+                print(f"Scheduled event {handle.name or handle.callback} failed: {e}")
+
+        self.rearm()
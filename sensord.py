@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+import temperature
+import carbondioxide
+import door
+from polling import AdaptivePoller
+
+# One daemon per machine; every pet on it reads from this socket
+SOCKET_PATH = '/tmp/hentaimate-sensors.sock'
+
+# The daemon republishes at least every 30 s (the door's longest poll interval);
+# a snapshot much older than that means its polling is stuck
+STALE_AFTER = 90
+
+# The daemon answers from memory; anything slower means it is stuck, and
+# the pet reads on the GUI thread
+CLIENT_TIMEOUT = 0.05
+
+SENSORS = {
+    'temperature': temperature.get_temperature,
+    'co2': carbondioxide.get_co2,
+    'door': door.get_door_status,
+}
+
+
+def read_sensor(kind):
+    try:
+        return SENSORS[kind]()
+    except Exception as e:
+        # Publish no reading; clients fall back to their defaults
+        print(f"Error reading {kind} sensor: {e}")
+        return None
+
+
+class SnapshotHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # Clients keep the connection open and send one line per read
+        for _ in self.rfile:
+            self.wfile.write(self.server.snapshot)
+            self.wfile.flush()
+
+
+class SensorDaemon(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path=SOCKET_PATH):
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, SnapshotHandler)
+        os.chmod(path, 0o666)  # Shared between all users on the machine
+        self.path = path
+        self.poller = AdaptivePoller()
+        self.readings = {kind: None for kind in SENSORS}
+        self.poll_due()
+        self.poll_thread = threading.Thread(target=self.poll_forever, daemon=True)
+
+    def publish(self):
+        # Pre-encoded so serving a read is a single write
+        self.snapshot = (json.dumps(dict(self.readings, updated=time.time())) + '\n').encode()
+
+    def poll_due(self):
+        for kind in self.poller.due_now():
+            self.readings[kind] = read_sensor(kind)
+            self.poller.observe(kind, self.readings[kind])
+        self.publish()
+
+    def poll_forever(self):
+        while True:
+            time.sleep(max(0, self.poller.next_due() - time.time()))
+            self.poll_due()
+
+    def run(self):
+        self.poll_thread.start()
+        try:
+            self.serve_forever()
+        finally:
+            self.server_close()
+            os.unlink(self.path)
+            print(f"Sensor requests saved against polling every 5 s: {self.poller.requests_saved()}")
+
+
+class SensorClient:
+    def __init__(self, path=SOCKET_PATH):
+        self.path = path
+        self.sock = None
+        self.reader = None
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(CLIENT_TIMEOUT)
+        self.sock.connect(self.path)
+        self.reader = self.sock.makefile('rb')
+
+    def close(self):
+        if self.sock:
+            self.reader.close()
+            self.sock.close()
+            self.sock = None
+
+    def request(self):
+        if not self.sock:
+            self.connect()
+        self.sock.sendall(b'\n')
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Sensor daemon closed the connection")
+        return json.loads(line)
+
+    def read(self):
+        # Retry once on a fresh connection in case the daemon was restarted
+        try:
+            readings = self.request()
+        except socket.timeout:
+            # A hung daemon won't answer a second time either; a late reply
+            # would also leave this connection out of step
+            self.close()
+            raise
+        except OSError:
+            self.close()
+            readings = self.request()
+
+        age = time.time() - readings.get('updated', 0)
+        if age > STALE_AFTER:
+            raise ValueError(f"Sensor daemon readings are {int(age)} s old")
+        return readings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared sensor poller for all pets on this machine")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix socket to publish readings on")
+    args = parser.parse_args()
+
+    SensorDaemon(args.socket).run()
@@ -0,0 +1,191 @@
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from PySide6.QtCore import QObject, Signal
+
+import temperature
+import carbondioxide
+import door
+
+# Signature secret configured on the Data Connector
+WEBHOOK_SECRET = os.environ.get('WEBHOOK_SECRET', '')
+WEBHOOK_HOST = '127.0.0.1'
+WEBHOOK_PORT = 8765
+SIGNATURE_HEADER = 'X-Dt-Signature'
+MAX_BODY = 64 * 1024  # Sensor events are a few hundred bytes
+REQUEST_TIMEOUT = 5  # s a client may take to send its request
+
+# Only events from our own devices are fed into the pet
+SENSORS = {
+    'temperature': temperature,
+    'co2': carbondioxide,
+    'contact': door,
+}
+
+SAMPLE_EVENTS = [
+    {'eventType': 'temperature', 'data': {'temperature': {'value': 29.5}}},
+    {'eventType': 'co2', 'data': {'co2': {'ppm': 1150}}},
+    {'eventType': 'contact', 'data': {'contact': {'state': 'OPEN'}}},
+    {'eventType': 'contact', 'data': {'contact': {'state': 'CLOSED'}}},
+    {'eventType': 'co2', 'data': {'co2': {'ppm': 620}}},
+    {'eventType': 'temperature', 'data': {'temperature': {'value': 22.0}}},
+]
+
+
+def b64url_decode(value):
+    return base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+
+
+def b64url_encode(value):
+    return base64.urlsafe_b64encode(value).rstrip(b'=').decode('ascii')
+
+
+def sign(body, secret):
+    # HS256 JWT carrying a checksum of the body, as the sensor platform sends it
+    header = b64url_encode(json.dumps({'alg': 'HS256', 'typ': 'JWT'}).encode())
+    payload = b64url_encode(json.dumps({'checksum_sha256': hashlib.sha256(body).hexdigest()}).encode())
+    signing_input = f'{header}.{payload}'.encode('ascii')
+    signature = hmac.new(secret.encode(), signing_input, hashlib.sha256).digest()
+    return f'{header}.{payload}.{b64url_encode(signature)}'
+
+
+def verify_signature(body, token, secret):
+    try:
+        header, payload, signature = token.split('.')
+        signing_input = f'{header}.{payload}'.encode('ascii')
+        expected = hmac.new(secret.encode(), signing_input, hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, b64url_decode(signature)):
+            return False
+        claims = json.loads(b64url_decode(payload))
+    except (ValueError, AttributeError):
+        return False
+
+    # The token is only good for the body it was issued with
+    if not isinstance(claims, dict):
+        return False
+    if 'checksum_sha256' in claims:
+        return hmac.compare_digest(str(claims['checksum_sha256']), hashlib.sha256(body).hexdigest())
+    if 'checksum' in claims:
+        return hmac.compare_digest(str(claims['checksum']), hashlib.sha1(body).hexdigest())
+    return False
+
+
+def target_name(sensor):
+    return f'projects/{sensor.PROJECT_ID}/devices/{sensor.DEVICE_ID}'
+
+
+def parse_event(event):
+    # Returns (kind, value) for the readings the pet cares about, else None
+    event_type = event.get('eventType')
+    if event_type not in SENSORS or event.get('targetName') != target_name(SENSORS[event_type]):
+        return None
+
+    data = event.get('data', {})
+    try:
+        if event_type == 'temperature':
+            return 'temperature', data['temperature']['value']
+        elif event_type == 'co2':
+            return 'co2', data['co2']['ppm']
+        else:
+            return 'door', data['contact']['state']
+    except (KeyError, TypeError):
+        return None
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    # Slow or stalled clients can't hold a thread forever
+    timeout = REQUEST_TIMEOUT
+
+    def do_POST(self):
+        # The length is checked before reading anything unauthenticated
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_response(400)
+            self.end_headers()
+            return
+        if length > MAX_BODY:
+            self.send_response(413)
+            self.end_headers()
+            return
+        body = self.rfile.read(length)
+
+        token = self.headers.get(SIGNATURE_HEADER, '')
+        if not verify_signature(body, token, self.server.secret):
+            self.send_response(401)
+            self.end_headers()
+            return
+
+        try:
+            event = json.loads(body).get('event', {})
+        except (ValueError, AttributeError):
+            event = None
+        if not isinstance(event, dict):
+            self.send_response(400)
+            self.end_headers()
+            return
+
+        reading = parse_event(event)
+        if reading:
+            # Emitted from the server thread; Qt queues it onto the GUI thread
+            self.server.receiver.reading_received.emit(*reading)
+
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookReceiver(QObject):
+    reading_received = Signal(str, object)
+
+    def __init__(self, host=WEBHOOK_HOST, port=WEBHOOK_PORT, secret=WEBHOOK_SECRET, parent=None):
+        super().__init__(parent)
+        if not secret:
+            raise ValueError("A webhook signature secret is required")
+        self.server = ThreadingHTTPServer((host, port), WebhookHandler)
+        self.server.secret = secret
+        self.server.receiver = self
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def replay(url, secret=WEBHOOK_SECRET, events=SAMPLE_EVENTS):
+    # Local test client: sends signed sample events the way the platform would
+    if not secret:
+        raise ValueError("A webhook signature secret is required")
+    for sample in events:
+        event = dict(sample)
+        event['targetName'] = target_name(SENSORS[event['eventType']])
+        body = json.dumps({'event': event}).encode()
+        response = requests.post(
+            url=url,
+            data=body,
+            headers={'Content-Type': 'application/json', SIGNATURE_HEADER: sign(body, secret)}
+        )
+        print(f"{event['eventType']}: {response.status_code}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay signed sample sensor events at a webhook receiver")
+    parser.add_argument("url", nargs="?", default=f'http://{WEBHOOK_HOST}:{WEBHOOK_PORT}/', help="receiver to post to")
+    parser.add_argument("--secret", default=WEBHOOK_SECRET, help="signature secret (default: $WEBHOOK_SECRET)")
+    args = parser.parse_args()
+
+    replay(args.url, args.secret)